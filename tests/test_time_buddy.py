@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import date
+
+# Importing time_buddy creates its cache directory under HOME; keep it out of the real one
+os.environ["HOME"] = tempfile.mkdtemp()
+
+import time_buddy  # noqa: E402
+
+DAY = date(2025, 3, 4)
+SECOND = time_buddy.SECOND
+
+
+def entry(time, kind):
+    """Builds a `log show` entry for a screen event at the given wall-clock time on DAY."""
+    return {
+        "timestamp": f"{DAY.isoformat()} {time}+0100",
+        "eventMessage": f"com.apple.sessionagent.screenIs{kind}",
+    }
+
+
+def process(logs):
+    """Processes log entries for DAY and returns (hourly durations, block duration, open session start)."""
+    return time_buddy.process_day_events(time_buddy.parse_day_events(logs, DAY), DAY)
+
+
+class BlockTimeTests(unittest.TestCase):
+    def test_lock_just_before_the_hour(self):
+        hourly, block, open_since = process([
+            entry("09:30:00.000000", "Unlocked"),
+            entry("10:59:59.500000", "Locked"),
+        ])
+        self.assertEqual(hourly[9], 1800 * SECOND)
+        self.assertEqual(hourly[10], 3599500000)
+        self.assertEqual(hourly[11], 0)
+        self.assertEqual(block, 5399500000)
+        self.assertIsNone(open_since)
+
+    def test_lock_just_before_midnight(self):
+        hourly, block, _ = process([
+            entry("22:30:00.000000", "Unlocked"),
+            entry("23:59:59.200000", "Locked"),
+        ])
+        self.assertEqual(hourly[22], 1800 * SECOND)
+        self.assertEqual(hourly[23], 3599200000)
+        self.assertEqual(block, 5399200000)
+
+    def test_lock_on_the_hour(self):
+        hourly, block, _ = process([
+            entry("09:30:00.000000", "Unlocked"),
+            entry("10:00:00.000000", "Locked"),
+        ])
+        self.assertEqual(hourly[9], 1800 * SECOND)
+        self.assertEqual(hourly[10], 0)
+        self.assertEqual(block, 1800 * SECOND)
+
+
+class CacheTests(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        time_buddy.db_init(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_events_within_a_second_survive_the_cache(self):
+        events = time_buddy.parse_day_events([
+            entry("10:00:00.100000", "Unlocked"),
+            entry("10:00:00.400000", "Locked"),
+            entry("10:00:00.800000", "Unlocked"),
+            entry("10:30:00.000000", "Locked"),
+        ], DAY)
+        with self.conn:
+            time_buddy.db_cache_events(self.conn, DAY, events)
+        cached = time_buddy.db_get_events_for_day(self.conn, DAY)
+
+        self.assertEqual(cached, events)
+        hourly, block, _ = time_buddy.process_day_events(cached, DAY)
+        self.assertEqual(hourly[10], 1799500000)
+        self.assertEqual((hourly, block), time_buddy.process_day_events(events, DAY)[:2])
+
+    def test_resumed_day_matches_a_fresh_fetch(self):
+        events = time_buddy.parse_day_events([
+            entry("09:00:00.000000", "Unlocked"),
+            entry("09:45:10.200000", "Locked"),
+            entry("09:45:10.700000", "Unlocked"),
+            entry("11:20:00.000000", "Locked"),
+            entry("11:20:00.900000", "Unlocked"),
+            entry("12:05:00.000000", "Locked"),
+        ], DAY)
+        with self.conn:
+            time_buddy.db_cache_events(self.conn, DAY, events[:2])
+
+        # A resumed fetch reads the log from the whole second of the last cached event on
+        last_time = time_buddy.db_get_last_event_time(self.conn, DAY)
+        start = last_time // SECOND * SECOND
+        with self.conn:
+            time_buddy.db_cache_events(self.conn, DAY, [event for event in events if event[0] >= start])
+        cached = time_buddy.db_get_events_for_day(self.conn, DAY)
+
+        self.assertEqual(cached, events)
+        self.assertEqual(time_buddy.process_day_events(cached, DAY), time_buddy.process_day_events(events, DAY))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,8 +4,19 @@ import json
 import os
 import sqlite3
 import subprocess
+import sys
+import tempfile
 from collections import defaultdict
-from datetime import date, datetime, time, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+# orjson is optional; it parses large `log show` output considerably faster.
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 __version__ = "1.0.5"
 
@@ -19,6 +30,20 @@ def get_version():
 
 # --- Configuration ---
 DEFAULT_EXPECTED_HOURS_PER_DAY = 7.5
+LOG_PREDICATE = 'process == "loginwindow" and eventMessage contains "com.apple.sessionagent.screenIs"'
+# Maximum number of `log show` processes run at the same time when fetching
+FETCH_WORKERS = 4
+# Event times are kept as integer microseconds since local midnight, the precision of the log
+SECOND = 1000000
+HOUR = 3600 * SECOND
+
+# --- Hourly breakdown cells ---
+# Color gradient (10 steps from red to green in ANSI 256-color), rendered once at import.
+# Index 0 is a faint grey for hours with no activity.
+GRADIENT_COLORS = [196, 202, 208, 214, 220, 226, 190, 154, 118, 46]
+HOUR_CELLS = ('\033[38;5;240m█\033[0m',) + tuple(f'\033[38;5;{color}m█\033[0m' for color in GRADIENT_COLORS)
+# Weekday labels indexed by date.weekday() (Monday=0); weekends are cyan
+DAY_LABELS = (" (Mon)", " (Tue)", " (Wed)", " (Thu)", " (Fri)", " \033[38;5;51m(Sat)\033[0m", " \033[38;5;51m(Sun)\033[0m")
 
 def get_db_path():
     """Returns the platform-specific path to the database file."""
@@ -38,17 +63,26 @@ DB_FILE = get_db_path()
 # --- Database Functions ---
 def db_connect():
     """Connects to the SQLite database."""
-    return sqlite3.connect(DB_FILE)
+    conn = sqlite3.connect(DB_FILE)
+    # WAL with relaxed syncing keeps cache writes cheap; the cache can always be rebuilt from the logs
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
 
 def db_init(conn):
     """Initializes the database schema."""
     with conn:
+        # One row per screen event: microseconds since local midnight and 1 for unlock, 0 for lock
         conn.execute("""
-            CREATE TABLE IF NOT EXISTS raw_logs (
+            CREATE TABLE IF NOT EXISTS events (
                 day TEXT,
-                timestamp TEXT,
-                data TEXT,
-                UNIQUE(day, timestamp, data)
+                ts INTEGER,
+                kind INTEGER,
+                UNIQUE(day, ts, kind)
             )
         """)
         conn.execute("""
@@ -56,6 +90,22 @@ def db_init(conn):
                 day TEXT PRIMARY KEY
             )
         """)
+        db_migrate_raw_logs(conn)
+
+def db_migrate_raw_logs(conn):
+    """Converts raw JSON log entries cached by older versions into events, then drops them."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'raw_logs'")
+    if cursor.fetchone() is None:
+        return
+
+    # Older system logs may already be rotated out, so the cached history is converted rather than refetched
+    cursor.execute("SELECT DISTINCT day FROM raw_logs")
+    for (day_str,) in cursor.fetchall():
+        rows = conn.execute("SELECT data FROM raw_logs WHERE day = ? ORDER BY timestamp", (day_str,))
+        day = date.fromisoformat(day_str)
+        db_cache_events(conn, day, parse_day_events([json_loads(data) for (data,) in rows], day))
+    conn.execute("DROP TABLE raw_logs")
 
 def db_is_day_cached(conn, day):
     """Checks if a past day has been fully cached."""
@@ -63,132 +113,170 @@ def db_is_day_cached(conn, day):
     cursor.execute("SELECT 1 FROM fetched_days WHERE day = ?", (day.isoformat(),))
     return cursor.fetchone() is not None
 
-def db_get_logs_for_day(conn, day):
-    """Retrieves all log entries for a given day from the cache."""
+def db_get_events_for_day(conn, day):
+    """Retrieves a day's (microseconds since midnight, is_unlock) events from the cache, in chronological order."""
     cursor = conn.cursor()
-    cursor.execute("SELECT data FROM raw_logs WHERE day = ?", (day.isoformat(),))
-    return [json.loads(row[0]) for row in cursor.fetchall()]
+    # Rows are inserted in log order, so rowid keeps that order
+    cursor.execute("SELECT ts, kind FROM events WHERE day = ? ORDER BY rowid", (day.isoformat(),))
+    # Rows already have the event shape; kind is 1 or 0, which works as is_unlock as-is
+    return cursor.fetchall()
 
-def db_cache_logs(conn, day, logs):
-    """Caches a list of log entries for a given day."""
-    log_data = [(day.isoformat(), entry.get("timestamp"), json.dumps(entry)) for entry in logs]
-    with conn:
-        conn.executemany("INSERT OR IGNORE INTO raw_logs (day, timestamp, data) VALUES (?, ?, ?)", log_data)
+def db_get_last_event_time(conn, day):
+    """Returns the latest cached event time for a day in microseconds since midnight, or None if none is cached."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(ts) FROM events WHERE day = ?", (day.isoformat(),))
+    return cursor.fetchone()[0]
 
-def db_mark_day_as_cached(conn, day):
-    """Marks a day as fully fetched in the database."""
-    with conn:
-        conn.execute("INSERT OR IGNORE INTO fetched_days (day) VALUES (?)", (day.isoformat(),))
+def db_cache_events(conn, day, events):
+    """Caches a day's (microseconds since midnight, is_unlock) events. The caller owns the transaction."""
+    day_str = day.isoformat()
+    rows = ((day_str, ts, is_unlock) for ts, is_unlock in events)
+    conn.executemany("INSERT OR IGNORE INTO events (day, ts, kind) VALUES (?, ?, ?)", rows)
 
+def db_mark_day_as_cached(conn, day):
+    """Marks a day as fully fetched in the database. The caller owns the transaction."""
+    conn.execute("INSERT OR IGNORE INTO fetched_days (day) VALUES (?)", (day.isoformat(),))
 
-def print_hourly_breakdown(day: date, hourly_durations: defaultdict, block_duration: timedelta, expected_hours: float):
-    """Prints a single line of 24 colored blocks representing a day's screen time."""
-    # --- Color gradient (10 steps from red to green in ANSI 256-color) ---
-    gradient_colors = [196, 202, 208, 214, 220, 226, 190, 154, 118, 46]
 
-    total_duration = sum(hourly_durations.values(), timedelta())
-    total_hours = total_duration.total_seconds() / 3600
-    total_block_hours = block_duration.total_seconds() / 3600
+def format_hourly_breakdown(day: date, hourly_durations: list, block_duration: int, expected_hours: float):
+    """Formats a single line of 24 colored blocks representing a day's screen time."""
+    total_hours = sum(hourly_durations) / HOUR
+    total_block_hours = block_duration / HOUR
     raw_percentage = (total_hours / expected_hours) * 100
     block_percentage = (total_block_hours / expected_hours) * 100
 
-    # Determine day of week and apply appropriate color
-    day_of_week = day.weekday()  # Monday=0, Sunday=6
-    day_names = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-    day_name = day_names[day_of_week]
+    parts = [f"{day.isoformat()}{DAY_LABELS[day.weekday()]}: "]
 
-    # Use cyan for weekends, default color for weekdays
-    if day_of_week >= 5:  # Saturday or Sunday
-        day_label = f" \033[38;5;51m({day_name})\033[0m"
-    else:
-        day_label = f" ({day_name})"
+    for duration in hourly_durations:
+        if duration > 0:
+            # Map minutes (1-60) to a gradient step (1-10) in integer math: 6 minutes per step
+            parts.append(HOUR_CELLS[min(max((duration - 60 * SECOND) // (360 * SECOND), 0), 9) + 1])
+        else:
+            parts.append(HOUR_CELLS[0])
 
-    output_line = f"{day.isoformat()}{day_label}: "
+    raw_str = f"Raw: {total_hours:.1f} h ({raw_percentage:.0f}%)"
+    block_str = f"Block: {total_block_hours:.1f} h ({block_percentage:.0f}%)"
+    parts.append(f"  {raw_str:<22}{block_str}")
+    return "".join(parts)
 
-    for hour in range(24):
-        minutes = hourly_durations.get(hour, timedelta()).total_seconds() / 60
 
-        color_code = ""
-        if minutes > 0:
-            # Map minutes (1-60) to a gradient index (0-9)
-            gradient_index = min(int((minutes - 1) / 6), len(gradient_colors) - 1)
-            ansi_color = gradient_colors[gradient_index]
-            color_code = f'\033[38;5;{ansi_color}m'
-        else:
-            # Use a faint grey for hours with no activity
-            color_code = '\033[38;5;240m'
+def micros_since_midnight(timestamp):
+    """Returns the microseconds elapsed since midnight on the timestamp's wall clock."""
+    return (timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second) * SECOND + timestamp.microsecond
 
-        output_line += f"{color_code}█\033[0m"
 
-    raw_str = f"Raw: {total_hours:.1f} h ({raw_percentage:.0f}%)"
-    block_str = f"Block: {total_block_hours:.1f} h ({block_percentage:.0f}%)"
-    output_line += f"  {raw_str:<22}{block_str}"
-    print(output_line)
+def parse_fraction_micros(timestamp_str):
+    """Returns the fractional second of a log timestamp in microseconds, or 0 if it has none."""
+    if timestamp_str[19:20] != '.':
+        return 0
+    fraction = timestamp_str[20:26]
+    # The fraction ends at the zone offset; it usually has all 6 digits
+    digits = fraction[:len(fraction) - len(fraction.lstrip('0123456789'))]
+    return int(digits.ljust(6, '0')) if digits else 0
+
+
+def format_time_of_day(ts):
+    """Formats microseconds since midnight as HH:MM:SS, dropping the fraction."""
+    seconds = ts // SECOND
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def bucket_session(hourly_durations, start, end):
+    """Splits a session given as microseconds since midnight across the hour buckets it overlaps."""
+    if end <= start:
+        return
+    start_hour = start // HOUR
+    end_hour = (end - 1) // HOUR
+    if start_hour == end_hour:
+        hourly_durations[start_hour] += end - start
+        return
+
+    # Partial first hour, whole hours in between, partial last hour
+    hourly_durations[start_hour] += (start_hour + 1) * HOUR - start
+    for hour in range(start_hour + 1, end_hour):
+        hourly_durations[hour] += HOUR
+    hourly_durations[end_hour] += end - end_hour * HOUR
+
 
+def parse_day_events(logs, current_day):
+    """
+    Extracts a day's screen lock/unlock events from log entries in chronological order,
+    as produced by `log show` and by the cache.
 
-def process_day_logs(logs, current_day, verbose=False):
-    """Processes log entries for a single day and returns hourly durations and block duration."""
+    Returns a list of (microseconds since midnight, is_unlock) tuples.
+    """
     events = []
+    day_str = current_day.isoformat()
     for entry in logs:
+        # Classify first so entries that are neither a lock nor an unlock are never parsed
+        # One scan finds the shared "screenIs" prefix; the suffix right after it decides the kind
+        message = entry.get("eventMessage", "")
+        i = message.find("screenIs") + 8
+        if i < 8:
+            continue
+        if message.startswith("Unlocked", i):
+            is_unlock = True
+        elif message.startswith("Locked", i):
+            is_unlock = False
+        else:
+            continue
+
+        # Timestamps have a fixed layout, "YYYY-MM-DD HH:MM:SS.ffffff+zzzz", so the day is
+        # checked as a string and the time is read by offset without building a datetime
         timestamp_str = entry.get("timestamp")
-        if not timestamp_str:
+        if not timestamp_str or timestamp_str[:10] != day_str:
             continue
 
         try:
-            timestamp = datetime.fromisoformat(timestamp_str)
+            seconds = int(timestamp_str[11:13]) * 3600 + int(timestamp_str[14:16]) * 60 + int(timestamp_str[17:19])
         except ValueError:
-            try:
-                timestamp = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f")
-            except ValueError:
-                continue
-
-        # Ensure the event belongs to the current day being processed
-        if timestamp.date() != current_day:
             continue
+        events.append((seconds * SECOND + parse_fraction_micros(timestamp_str), is_unlock))
+
+    return events
 
-        message = entry.get("eventMessage", "")
 
-        if "screenIsUnlocked" in message:
-            events.append({'timestamp': timestamp, 'type': 'unlocked'})
-        elif "screenIsLocked" in message:
-            events.append({'timestamp': timestamp, 'type': 'locked'})
+def process_day_events(events, current_day, verbose=False, unlocked_at_midnight=False):
+    """
+    Calculates screen time for a single day from its chronological lock/unlock events.
 
-    events.sort(key=lambda x: x['timestamp'])
+    Returns the screen time of each of the 24 hours, the block time and the start of a session still
+    open at the end of the day (or None), all in microseconds.
+    """
+    # The day starts unlocked when the previous day carried over an open session
+    if unlocked_at_midnight:
+        events = [(0, True)] + events
 
     # --- Calculate precise screen time (sum of unlock-to-lock sessions) ---
-    hourly_durations = defaultdict(timedelta)
+    hourly_durations = [0] * 24
     unlock_time = None
     if verbose:
         print(f"Processing sessions for {current_day.isoformat()}:")
 
-    for event in events:
-        if event['type'] == 'unlocked':
+    for ts, is_unlock in events:
+        if is_unlock:
             if unlock_time is None:
-                unlock_time = event['timestamp']
-        elif event['type'] == 'locked':
-            if unlock_time is not None:
-                lock_time = event['timestamp']
-                duration = lock_time - unlock_time
-                if verbose:
-                    print(f"  - Session from {unlock_time.strftime('%Y-%m-%d %H:%M:%S')} to {lock_time.strftime('%Y-%m-%d %H:%M:%S')} (Duration: {duration})")
-
-                current_time = unlock_time
-                while current_time < lock_time:
-                    current_hour_start = current_time.replace(minute=0, second=0, microsecond=0)
-                    next_hour_start = current_hour_start + timedelta(hours=1)
-
-                    segment_end = min(lock_time, next_hour_start)
-                    duration_in_hour = segment_end - current_time
-
-                    hourly_durations[current_time.hour] += duration_in_hour
-
-                    current_time = next_hour_start
-
-                unlock_time = None
+                unlock_time = ts
+        elif unlock_time is not None:
+            if verbose:
+                print(f"  - Session from {current_day.isoformat()} {format_time_of_day(unlock_time)} to {current_day.isoformat()} {format_time_of_day(ts)} (Duration: {timedelta(microseconds=ts - unlock_time)})")
+            bucket_session(hourly_durations, unlock_time, ts)
+            unlock_time = None
 
     # --- Calculate Block Time (total span of continuous activity) ---
-    total_block_duration = timedelta()
-    active_hours = sorted([h for h, d in hourly_durations.items() if d.total_seconds() > 0])
+    # Events are chronological, so one pass yields the first and last event of every hour.
+    # A lock belongs to the last hour its session is credited to, so a lock exactly on
+    # the hour closes the previous hour rather than opening the next one.
+    hour_first = {}
+    hour_last = {}
+    for ts, is_unlock in events:
+        hour = ts // HOUR if is_unlock else (ts - 1) // HOUR
+        if hour not in hour_first:
+            hour_first[hour] = ts
+        hour_last[hour] = ts
+
+    block_duration = 0
+    active_hours = [h for h in range(24) if hourly_durations[h] > 0]
 
     if active_hours:
         current_block_start_hour = active_hours[0]
@@ -197,27 +285,84 @@ def process_day_logs(logs, current_day, verbose=False):
             if active_hours[i] > active_hours[i-1] + 1:
                 # Process the completed block
                 block_end_hour = active_hours[i-1]
-
-                first_event_in_block = min([e['timestamp'] for e in events if e['timestamp'].hour == current_block_start_hour])
-                last_event_in_block = max([e['timestamp'] for e in events if e['timestamp'].hour == block_end_hour])
-
-                total_block_duration += last_event_in_block - first_event_in_block
+                block_duration += hour_last[block_end_hour] - hour_first[current_block_start_hour]
 
                 # Start a new block
                 current_block_start_hour = active_hours[i]
 
         # Process the final block
-        last_block_end_hour = active_hours[-1]
-        first_event_in_block = min([e['timestamp'] for e in events if e['timestamp'].hour == current_block_start_hour])
-        last_event_in_block = max([e['timestamp'] for e in events if e['timestamp'].hour == last_block_end_hour])
-        total_block_duration += last_event_in_block - first_event_in_block
+        block_duration += hour_last[active_hours[-1]] - hour_first[current_block_start_hour]
+
+    return hourly_durations, block_duration, unlock_time
+
+def split_fetch_batches(days, max_batches):
+    """
+    Splits sorted days into batches of consecutive days to fetch with one `log show` each.
+
+    Long runs are cut into about max_batches pieces so they can be fetched in parallel;
+    gaps (days already cached) always start a new batch.
+    """
+    batch_size = -(-len(days) // max_batches)
+    batches = []
+    for day in days:
+        if batches and len(batches[-1]) < batch_size and batches[-1][-1] + timedelta(days=1) == day:
+            batches[-1].append(day)
+        else:
+            batches.append([day])
+    return batches
+
+
+def fetch_logs(start_day, end_day, start_time=0):
+    """
+    Fetches screen lock/unlock log entries for a range of days with a single `log show` call.
+
+    The range starts start_time microseconds after midnight on start_day, so a partly cached day
+    only reads the log since its last cached event.
 
-    return hourly_durations, total_block_duration, unlock_time
+    Returns a dict mapping ISO day strings to that day's log entries, in log order.
+    """
+    # `log show` reads dates without an offset as local time, which also keeps DST days right
+    command = [
+        'log', 'show', '--style', 'ndjson',
+        '--predicate', LOG_PREDICATE,
+        '--start', f"{start_day.isoformat()} {format_time_of_day(start_time)}",
+        '--end', f"{end_day.isoformat()} 23:59:59"
+    ]
+
+    # Stream one JSON object per line so parsing overlaps with `log show` and the
+    # whole output is never held in memory. Lines stay bytes; both parsers accept them.
+    logs_by_day = defaultdict(list)
+    day_key = day_logs = None
+    # A 1 MiB pipe buffer keeps read syscalls low on multi-day ranges. stderr goes to a
+    # temporary file: a second pipe that is only read after stdout could fill up and hang.
+    with tempfile.TemporaryFile() as stderr_file:
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file, bufsize=1 << 20) as proc:
+            for line in proc.stdout:
+                # Only lock/unlock records are kept, so skip anything else before decoding it.
+                # This also drops blank lines and the trailing summary record.
+                if b'screenIs' not in line:
+                    continue
+                entry = json_loads(line)
+                timestamp_str = entry.get("timestamp")
+                if not timestamp_str:
+                    continue
+                # Entries arrive in time order, so a day's entries are contiguous: keep appending
+                # to the current day's list and only look up another one when the date changes
+                if day_logs is None or not timestamp_str.startswith(day_key):
+                    day_key = timestamp_str[:10]
+                    day_logs = logs_by_day[day_key]
+                day_logs.append(entry)
+        stderr_file.seek(0)
+        stderr = stderr_file.read()
+
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, command, stderr=stderr)
+    return logs_by_day
 
 
 def get_screen_time(days_back, verbose=False, no_cache=False, include_weekends=False, expected_hours=DEFAULT_EXPECTED_HOURS_PER_DAY):
     """
-    Calculates screen time for the last N days, fetching logs day by day.
+    Calculates screen time for the last N days, fetching uncached days from the system log.
 
     Args:
         days_back: Number of days to look back
@@ -236,10 +381,12 @@ def get_screen_time(days_back, verbose=False, no_cache=False, include_weekends=F
 
     daily_hourly_durations = {}
     daily_block_durations = {}
-    today = datetime.now().date()
     total_actual_hours = 0
     days_with_activity = set()
     local_tz = get_localzone()
+    # Take the clock once so "today" and the end of an open session agree for the whole run
+    now = datetime.now(local_tz)
+    today = now.date()
 
     spinner = None
     if not verbose:
@@ -250,143 +397,125 @@ def get_screen_time(days_back, verbose=False, no_cache=False, include_weekends=F
         # We must process chronologically to handle sessions crossing midnight
         dates_to_process = [today - timedelta(days=i) for i in range(days_back - 1, -1, -1)]
 
+        # Past days can be loaded from cache. Today is fetched on every run.
+        days_to_fetch = [
+            day for day in dates_to_process
+            if no_cache or day == today or not db_is_day_cached(conn, day)
+        ]
+        fetched_events = {}
+
+        # Once part of today is cached, only the log since its last cached event is read.
+        # `log show` starts on a whole second, so the range begins at the start of that
+        # event's second; events from it that are already cached are dropped by the unique index.
+        resume_time = None if no_cache else db_get_last_event_time(conn, today)
+        if resume_time is None:
+            fetch_jobs = [(batch, 0) for batch in split_fetch_batches(days_to_fetch, FETCH_WORKERS)]
+        else:
+            # Today is always the last day to fetch; it gets its own, shorter range
+            fetch_jobs = [(batch, 0) for batch in split_fetch_batches(days_to_fetch[:-1], FETCH_WORKERS)]
+            fetch_jobs.append(([today], resume_time // SECOND * SECOND))
+
+        if days_to_fetch:
+            range_str = f"{days_to_fetch[0].isoformat()} to {days_to_fetch[-1].isoformat()}"
+            if spinner:
+                spinner.text = f"Fetching logs for {range_str}..."
+            if verbose:
+                print(f"\nFetching logs for {range_str}...")
+
+            # Each `log show` runs in its own process and the threads only wait on it,
+            # so the batches are fetched concurrently
+            with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+                futures = [
+                    (batch, executor.submit(fetch_logs, batch[0], batch[-1], start_time))
+                    for batch, start_time in fetch_jobs
+                ]
+
+                for batch, future in futures:
+                    batch_str = f"{batch[0].isoformat()} to {batch[-1].isoformat()}"
+                    try:
+                        logs_by_day = future.result()
+                    except subprocess.CalledProcessError as e:
+                        if e.returncode == 1 and not e.stderr:
+                            pass  # No logs found
+                        else:
+                            if spinner:
+                                spinner.fail(f"Error executing log command for {batch_str}")
+                            print(f"Error executing log command for {batch_str}: {e}")
+                            # Output is captured as bytes; decode stderr only here, for the message
+                            if e.stderr:
+                                print(e.stderr.decode(errors='replace').strip())
+                        continue
+                    except json.JSONDecodeError:
+                        if spinner:
+                            spinner.fail(f"Error decoding JSON from log output for {batch_str}")
+                        print(f"Error decoding JSON from log output for {batch_str}.")
+                        continue
+
+                    for day in batch:
+                        fetched_events[day] = parse_day_events(logs_by_day.get(day.isoformat(), []), day)
+
+            # Cache the newly fetched events in a single transaction
+            with conn:
+                for day, day_events in fetched_events.items():
+                    db_cache_events(conn, day, day_events)
+                    if day != today:
+                        db_mark_day_as_cached(conn, day)
+
+            # Only today's new events were fetched; process the whole day from the cache.
+            # This also keeps the cached part of today if the fetch failed.
+            if resume_time is not None:
+                fetched_events[today] = db_get_events_for_day(conn, today)
+
         # Track whether the previous processed day ended unlocked (carry-over)
         carry_over_unlocked = False
-        carry_over_tzinfo = None
 
         for current_day in dates_to_process:
             if spinner:
                 spinner.text = f"Processing {current_day.isoformat()}..."
 
-            logs = []
-            is_cached = not no_cache and db_is_day_cached(conn, current_day)
-
-            # Past days can be loaded from cache. Today is always fetched fresh.
-            if is_cached and current_day != today:
-                if spinner:
-                    spinner.text = f"Loading logs from cache for {current_day.isoformat()}..."
-                logs = db_get_logs_for_day(conn, current_day)
+            if current_day in fetched_events:
+                events = fetched_events[current_day]
                 if verbose:
-                    print(f"\nLoaded {len(logs)} log entries from cache for {current_day.isoformat()}.")
+                    print(f"\nFound {len(events)} screen events for {current_day.isoformat()}.")
+            elif current_day in days_to_fetch:
+                events = []  # The fetch failed; nothing to process for this day
             else:
-                if spinner:
-                    spinner.text = f"Fetching logs for {current_day.isoformat()}..."
-
-                start_of_day = datetime.combine(current_day, datetime.min.time())
-                end_of_day = datetime.combine(current_day, datetime.max.time())
-                start_of_day_aware = start_of_day.replace(tzinfo=local_tz)
-                end_of_day_aware = end_of_day.replace(tzinfo=local_tz)
-
+                events = db_get_events_for_day(conn, current_day)
                 if verbose:
-                    print(f"\nFetching logs for {current_day.isoformat()}...")
-
-                predicate = 'process == "loginwindow" and eventMessage contains "com.apple.sessionagent.screenIs"'
-                command = [
-                    'log', 'show', '--style', 'json',
-                    '--predicate', predicate,
-                    '--start', start_of_day_aware.strftime('%Y-%m-%d %H:%M:%S%z'),
-                    '--end', end_of_day_aware.strftime('%Y-%m-%d %H:%M:%S%z')
-                ]
-
-                try:
-                    result = subprocess.run(command, capture_output=True, text=True, check=True)
-                    fetched_logs = json.loads(result.stdout)
-                    logs.extend(fetched_logs)
-
-                    if verbose:
-                        print(f"Found {len(logs)} log entries.")
+                    print(f"\nLoaded {len(events)} screen events from cache for {current_day.isoformat()}.")
 
-                    # Cache the newly fetched logs
-                    db_cache_logs(conn, current_day, logs)
-                    if current_day != today:
-                        db_mark_day_as_cached(conn, current_day)
-
-                except subprocess.CalledProcessError as e:
-                    if e.returncode == 1 and not e.stdout and not e.stderr:
-                        pass  # No logs found
-                    else:
-                        if spinner:
-                            spinner.fail(f"Error executing log command for {current_day.isoformat()}")
-                        print(f"Error executing log command for {current_day.isoformat()}: {e}")
-                except json.JSONDecodeError:
-                    if spinner:
-                        spinner.fail(f"Error decoding JSON from log output for {current_day.isoformat()}")
-                    print(f"Error decoding JSON from log output for {current_day.isoformat()}.")
-
-            if not logs:
+            if not events:
                 carry_over_unlocked = False
                 continue
 
-            # Inject a synthetic unlocked event at 00:00 only if previous day carried over unlocked
-            if carry_over_unlocked:
-                start_of_day = datetime.combine(current_day, datetime.min.time())
-                tzinfo = carry_over_tzinfo or local_tz
-                start_of_day = start_of_day.replace(tzinfo=tzinfo)
-                logs.append({
-                    "timestamp": start_of_day.isoformat(),
-                    "eventMessage": "screenIsUnlocked (synthetic carryover)"
-                })
-
-            hourly_durations, block_duration, last_unlock_time = process_day_logs(logs, current_day, verbose)
+            # Start the day unlocked only if the previous day carried over an open session
+            hourly_durations, block_duration, open_since = process_day_events(events, current_day, verbose, carry_over_unlocked)
 
             # If the last event of the day was an unlock, it's an open session
-            if last_unlock_time is not None:
+            if open_since is not None:
                 # If it's today, calculate up to now
                 if current_day == today:
-                    now = datetime.now(local_tz)
-                    if last_unlock_time.date() == today:
-                        duration = now - last_unlock_time
-                        if verbose:
-                            print(f"  - Active session: from {last_unlock_time.strftime('%H:%M:%S')} to now (Duration: {duration})")
-
-                        current_time = last_unlock_time
-                        while current_time < now:
-                            current_hour_start = current_time.replace(minute=0, second=0, microsecond=0)
-                            next_hour_start = current_hour_start + timedelta(hours=1)
-
-                            segment_end = min(now, next_hour_start)
-                            duration_in_hour = segment_end - current_time
-
-                            hourly_durations[current_time.hour] += duration_in_hour
-
-                            current_time = next_hour_start
-
-                        block_duration += now - last_unlock_time
+                    end = micros_since_midnight(now)
+                    if verbose:
+                        print(f"  - Active session: from {format_time_of_day(open_since)} to now (Duration: {timedelta(microseconds=end - open_since)})")
                 # If it's a past day, calculate up to midnight
                 else:
-                    end_of_day = datetime.combine(current_day, time(23, 59, 59, 999999), tzinfo=last_unlock_time.tzinfo)
-                    duration = end_of_day - last_unlock_time
+                    end = 24 * HOUR
                     if verbose:
-                        print(f"  - Session carried over to next day: from {last_unlock_time.strftime('%H:%M:%S')} to 23:59:59 (Duration: {duration})")
-
-                    current_time = last_unlock_time
-                    while current_time < end_of_day:
-                        current_hour_start = current_time.replace(minute=0, second=0, microsecond=0)
-                        next_hour_start = current_hour_start + timedelta(hours=1)
-
-                        segment_end = min(end_of_day, next_hour_start)
-                        duration_in_hour = segment_end - current_time
+                        print(f"  - Session carried over to next day: from {format_time_of_day(open_since)} to 23:59:59 (Duration: {timedelta(microseconds=end - open_since)})")
 
-                        hourly_durations[current_time.hour] += duration_in_hour
-
-                        current_time = next_hour_start
-
-                    block_duration += end_of_day - last_unlock_time
+                bucket_session(hourly_durations, open_since, end)
+                block_duration += end - open_since
 
             # Update carry-over state for the next day
-            if last_unlock_time is not None:
-                carry_over_unlocked = True
-                carry_over_tzinfo = last_unlock_time.tzinfo
-            else:
-                carry_over_unlocked = False
-                carry_over_tzinfo = None
+            carry_over_unlocked = open_since is not None
 
-            if any(duration.total_seconds() > 0 for duration in hourly_durations.values()):
+            if any(hourly_durations):
                 daily_hourly_durations[current_day] = hourly_durations
                 daily_block_durations[current_day] = block_duration
                 days_with_activity.add(current_day)
                 if verbose:
-                    total_day_hours = sum(hourly_durations.values(), timedelta()).total_seconds() / 3600
+                    total_day_hours = sum(hourly_durations) / HOUR
                     print(f"Calculated {total_day_hours:.1f} hours of screen time.")
 
     except KeyboardInterrupt:
@@ -403,21 +532,23 @@ def get_screen_time(days_back, verbose=False, no_cache=False, include_weekends=F
         colorama.reinit()
 
     # --- Print Summaries ---
-    print("\n--- Daily Screen Time Summary ---")
+    # The report is collected and written at once rather than one line per day
+    out = ["", "--- Daily Screen Time Summary ---"]
     if not daily_hourly_durations:
-        print("No screen time data found for the selected period.")
+        out.append("No screen time data found for the selected period.")
+        sys.stdout.write("\n".join(out) + "\n")
         return
 
     sorted_days = sorted(daily_hourly_durations.keys())
     for day in sorted_days:
-        print_hourly_breakdown(day, daily_hourly_durations[day], daily_block_durations[day], expected_hours)
+        out.append(format_hourly_breakdown(day, daily_hourly_durations[day], daily_block_durations[day], expected_hours))
 
     # --- Total Summary ---
-    print("\n--- Total Summary ---")
+    out.extend(["", "--- Total Summary ---"])
     for day_data in daily_hourly_durations.values():
-        total_actual_hours += sum(day_data.values(), timedelta()).total_seconds() / 3600
+        total_actual_hours += sum(day_data) / HOUR
 
-    total_block_hours = sum([d.total_seconds() for d in daily_block_durations.values()]) / 3600
+    total_block_hours = sum(daily_block_durations.values()) / HOUR
 
     # Calculate expected hours based on include_weekends flag
     if include_weekends:
@@ -445,9 +576,11 @@ def get_screen_time(days_back, verbose=False, no_cache=False, include_weekends=F
         else:
             day_breakdown = f"{total_days} active day(s)"
 
-        print(f"Total for {day_breakdown}: {raw_str:<22}{block_str}")
+        out.append(f"Total for {day_breakdown}: {raw_str:<22}{block_str}")
     else:
-        print("No activity to summarize.")
+        out.append("No activity to summarize.")
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def main():
@@ -497,6 +630,10 @@ def main():
     if args.clear_cache:
         if os.path.exists(DB_FILE):
             os.remove(DB_FILE)
+            # Remove the WAL side files as well so no stale journal is replayed
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(DB_FILE + suffix):
+                    os.remove(DB_FILE + suffix)
             print(f"Cache file '{DB_FILE}' has been deleted.")
         else:
             print("No cache file to delete.")